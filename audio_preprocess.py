@@ -0,0 +1,175 @@
+# audio_preprocess.py
+# ==================================
+# Vectorized cleanup between capture and speech recognition.
+#
+# Pipeline: DC / high-pass filter -> (optional) spectral noise gate ->
+# silence trim -> gain normalization -> resample to the recognizer's rate.
+# Everything works on whole NumPy arrays; no per-sample Python loops.
+
+import math
+import time
+
+import numpy as np
+import scipy.signal as signal
+import speech_recognition as sr
+
+# Google Web Speech (recognize_google) works natively at 16 kHz mono
+ASR_SAMPLE_RATE = 16000
+
+# Speech must sit this far above the capture's own noise floor to survive the
+# trim. Same margin as EnergyTrigger.threshold_db in wake_trigger.py, but the
+# floors are estimated independently (the trigger's from ~6 s of room history,
+# this one from the capture itself), so a trigger fired against a stale, quieter
+# floor can still be trimmed to nothing; recognize() then skips the ASR call
+TRIM_MARGIN_DB = 12.0
+
+
+# -----------------------
+# Conversions
+# -----------------------
+def to_float(recording):
+    """int16 (any shape) -> mono float32 in -1..1."""
+    audio = np.asarray(recording)
+    if audio.ndim > 1:
+        audio = audio[:, 0]
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio.astype(np.float32)
+
+def to_int16(audio):
+    """float -1..1 -> int16, clipped."""
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+# -----------------------
+# Stages
+# -----------------------
+def highpass(audio, fs, cutoff=80.0, order=4):
+    """Remove DC offset and low-frequency rumble/hum below `cutoff` Hz."""
+    sos = signal.butter(order, cutoff, btype="highpass", fs=fs, output="sos")
+    return signal.sosfilt(sos, audio - np.mean(audio)).astype(np.float32)
+
+def frame_levels_db(audio, fs, frame_ms=20):
+    """Per-frame RMS level in dBFS (trailing partial frame is dropped)."""
+    frame_len = max(1, int(fs * frame_ms / 1000))
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32), frame_len
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1) + 1e-12)
+    return 20.0 * np.log10(rms), frame_len
+
+def trim_silence(audio, fs, margin_db=TRIM_MARGIN_DB, noise_percentile=10, frame_ms=20, pad_ms=150):
+    """
+    Cut leading/trailing frames that are not `margin_db` above the capture's noise
+    floor (the `noise_percentile` of its frame levels), keeping `pad_ms` of margin.
+    The threshold is relative, so quiet speech in a quiet room is kept for the gain stage.
+    """
+    levels, frame_len = frame_levels_db(audio, fs, frame_ms)
+    if levels.size == 0:
+        return audio[:0]
+    threshold_db = np.percentile(levels, noise_percentile) + margin_db
+    voiced = np.flatnonzero(levels > threshold_db)
+    if voiced.size == 0:
+        return audio[:0]
+    pad = int(fs * pad_ms / 1000)
+    start = max(0, voiced[0] * frame_len - pad)
+    end = min(len(audio), (voiced[-1] + 1) * frame_len + pad)
+    return audio[start:end]
+
+def spectral_gate(audio, fs, nperseg=512, noise_percentile=10, threshold=1.5, floor=0.1):
+    """
+    Attenuate STFT bins that sit close to the estimated noise spectrum.
+    The noise profile per frequency bin is the `noise_percentile` of its magnitude
+    over time, so no separate noise-only recording is needed.
+    """
+    if len(audio) < nperseg:
+        return audio
+    _, _, spec = signal.stft(audio, fs=fs, nperseg=nperseg)
+    magnitude = np.abs(spec)
+    noise_profile = np.percentile(magnitude, noise_percentile, axis=1, keepdims=True)
+    mask = np.where(magnitude > threshold * noise_profile, 1.0, floor)
+    # Light smoothing over time avoids "musical noise" from isolated bins
+    mask = signal.convolve2d(mask, np.ones((1, 3)) / 3.0, mode="same", boundary="symm")
+    _, cleaned = signal.istft(spec * mask, fs=fs, nperseg=nperseg)
+    return cleaned[:len(audio)].astype(np.float32)
+
+def normalize_gain(audio, target_peak=0.9, max_gain_db=30.0):
+    """Scale so the peak hits `target_peak`, never boosting more than `max_gain_db`."""
+    peak = np.max(np.abs(audio)) if len(audio) else 0.0
+    if peak <= 0.0:
+        return audio
+    gain = min(target_peak / peak, 10 ** (max_gain_db / 20.0))
+    return (audio * gain).astype(np.float32)
+
+def resample(audio, fs, target_fs):
+    """Polyphase resample to `target_fs`."""
+    if fs == target_fs:
+        return audio
+    g = math.gcd(int(fs), int(target_fs))
+    return signal.resample_poly(audio, target_fs // g, fs // g).astype(np.float32)
+
+
+# -----------------------
+# Full Pipeline
+# -----------------------
+def preprocess(recording, fs, target_fs=ASR_SAMPLE_RATE, noise_gate=False):
+    """
+    Clean a raw capture for ASR.
+    :return: (int16 samples, sample rate). Samples are empty if nothing but silence was captured.
+    """
+    audio = to_float(recording)
+    if len(audio) == 0:
+        return to_int16(audio), target_fs
+    audio = highpass(audio, fs)
+    if noise_gate:
+        # Before trimming, so the noise profile comes from the silence around the speech
+        audio = spectral_gate(audio, fs)
+    audio = trim_silence(audio, fs)
+    if len(audio) == 0:
+        return to_int16(audio), target_fs
+    audio = normalize_gain(audio)
+    audio = resample(audio, fs, target_fs)
+    return to_int16(audio), target_fs
+
+def to_audio_data(samples, fs):
+    """Wrap int16 mono samples for speech_recognition (no temp WAV file needed)."""
+    return sr.AudioData(np.ascontiguousarray(samples, dtype=np.int16).tobytes(), fs, 2)
+
+def encode_flac(samples, fs):
+    """Optional FLAC encoding for network backends that accept compressed uploads."""
+    return to_audio_data(samples, fs).get_flac_data()
+
+
+# Quick benchmark
+if __name__ == "__main__":
+    fs = 44100
+    duration = 5.0
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration * fs)) / fs
+
+    # 1.2 s silence, ~2.3 s voiced harmonics with syllable-rate AM, then silence;
+    # plus DC offset, mains hum and background hiss
+    voiced = (t > 1.2) & (t < 3.5)
+    speech = sum(np.sin(2 * np.pi * f0 * t) / k for k, f0 in enumerate((140, 280, 420, 700), 1))
+    speech *= 0.3 * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)) * voiced
+    raw = speech + 0.05 + 0.02 * np.sin(2 * np.pi * 50 * t) + 0.003 * rng.standard_normal(len(t))
+    raw = to_int16(raw)
+
+    raw_bytes = raw.nbytes
+    raw_flac = len(encode_flac(raw, fs))
+
+    for noise_gate in (False, True):
+        runs = 10
+        start = time.perf_counter()
+        for _ in range(runs):
+            cleaned, out_fs = preprocess(raw, fs, noise_gate=noise_gate)
+        elapsed = (time.perf_counter() - start) / runs
+
+        print(f"--- noise_gate={noise_gate} ---")
+        print(f"Preprocessing cost: {1000 * elapsed / duration:.2f} ms per second of audio")
+        print(f"Raw PCM  @ {fs} Hz: {raw_bytes:>8} bytes (FLAC {raw_flac} bytes)")
+        print(f"Cleaned PCM @ {out_fs} Hz: {cleaned.nbytes:>8} bytes "
+              f"({len(cleaned) / out_fs:.2f}s kept)")
+        flac = len(encode_flac(cleaned, out_fs))
+        print(f"Cleaned FLAC: {flac:>8} bytes ({100.0 * (1 - flac / raw_bytes):.1f}% smaller than raw PCM)")
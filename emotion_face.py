@@ -3,6 +3,8 @@
 import tkinter as tk
 import pyttsx3
 
+from face_renderer import FaceRenderer
+
 class EmotionFace:
     def __init__(self):
         # Define emoji faces
@@ -21,18 +23,11 @@ class EmotionFace:
         self.root = tk.Tk()
         self.root.title("Raphael Emotion Face")
 
-        self.label_face = tk.Label(self.root, text="😐", font=("Arial", 100))
-        self.label_face.pack(pady=20)
-
-        self.label_status = tk.Label(self.root, text="Waiting...", font=("Arial", 14))
-        self.label_status.pack(pady=10)
-
-        # Optional: Run GUI in non-blocking mode
-        self.root.after(100, self.update_gui)
-    
-    def update_gui(self):
-        self.root.update()
-        self.root.after(100, self.update_gui)
+        # Repaints are coalesced and scheduled on the Tk event loop
+        self.renderer = FaceRenderer(self.root, self.faces, face_font=("Arial", 100),
+                                     face_pady=20, initial_face="😐")
+        self.label_face = self.renderer.face_label
+        self.label_status = self.renderer.status_label
 
     def update_face(self, emotion, text_feedback=None, speak=True):
         """
@@ -44,11 +39,7 @@ class EmotionFace:
         if emotion not in self.faces:
             emotion = "neutral"
 
-        self.label_face.config(text=self.faces[emotion])
-        if text_feedback:
-            self.label_status.config(text=text_feedback)
-        else:
-            self.label_status.config(text=f"Emotion detected: {emotion}")
+        self.renderer.post(emotion, text_feedback or f"Emotion detected: {emotion}")
 
         if speak:
             self.engine.say(f"I see you are {emotion}")
@@ -0,0 +1,84 @@
+# face_renderer.py
+# ==================================
+# Shared Tk renderer for both EmotionFace implementations.
+#
+# Any thread may post face/status changes; they are merged and applied in a
+# single repaint per frame on the Tk thread. The thinking animation runs on
+# `after` timers instead of a sleeping background thread.
+
+import threading
+import tkinter as tk
+
+
+class FaceRenderer:
+    FRAME_MS = 33                 # ~30 repaints per second at most
+    THINKING_SYMBOLS = ["🤔", "😐"]
+    THINKING_INTERVAL_MS = 600
+
+    def __init__(self, root, faces, face_font=("Arial", 80), face_pady=10,
+                 initial_face="", status_text="Waiting..."):
+        self.root = root
+        self.faces = faces
+        self.face_label = tk.Label(root, text=initial_face, font=face_font)
+        self.face_label.pack(pady=face_pady)
+        self.status_label = tk.Label(root, text=status_text, font=("Arial", 14))
+        self.status_label.pack(pady=10)
+
+        self.current_emotion = "neutral"
+
+        self._lock = threading.Lock()
+        self._pending_emotion = None
+        self._pending_text = None
+        self._flush_scheduled = False
+        self._thinking_job = None
+        self._thinking_step = 0
+
+    def post(self, emotion, text_feedback=None):
+        """
+        Queue a face/status change (safe from any thread).
+        Posts that arrive within the same frame collapse into one repaint;
+        the last emotion and the last status text given win.
+        """
+        with self._lock:
+            self._pending_emotion = emotion
+            if text_feedback is not None:
+                self._pending_text = text_feedback
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.root.after(self.FRAME_MS, self._flush)
+
+    def _flush(self):
+        """Runs on the Tk thread: apply whatever is pending in one go."""
+        with self._lock:
+            emotion, text = self._pending_emotion, self._pending_text
+            self._pending_emotion = self._pending_text = None
+            self._flush_scheduled = False
+
+        if text is not None and text != self.status_label.cget("text"):
+            self.status_label.config(text=text)
+
+        if emotion is not None:
+            self.current_emotion = emotion
+            if emotion == "thinking":
+                if self._thinking_job is None:
+                    self._thinking_step = 0
+                    self._animate_thinking()
+            else:
+                self._stop_thinking()
+                self._set_face(self.faces.get(emotion, "😐"))
+
+    def _set_face(self, symbol):
+        if symbol != self.face_label.cget("text"):
+            self.face_label.config(text=symbol)
+
+    def _animate_thinking(self):
+        """Cycle between 🤔 and 😐 to simulate blinking/thinking."""
+        self._set_face(self.THINKING_SYMBOLS[self._thinking_step % len(self.THINKING_SYMBOLS)])
+        self._thinking_step += 1
+        self._thinking_job = self.root.after(self.THINKING_INTERVAL_MS, self._animate_thinking)
+
+    def _stop_thinking(self):
+        if self._thinking_job is not None:
+            self.root.after_cancel(self._thinking_job)
+            self._thinking_job = None
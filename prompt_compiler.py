@@ -0,0 +1,101 @@
+# prompt_compiler.py
+# ==================================
+# Token-efficient layout for the unified analysis prompt.
+#
+# The fixed instructions live in a byte-stable system prefix (identical on
+# every request) and each turn only sends the user's words, so the request is
+# an append-only conversation. The JSON reply shape is enforced with the
+# structured-output `response_format` instead of prose instructions.
+#
+# Caching limit: OpenAI only caches prompts of CACHE_MIN_TOKENS or more. The
+# prefix alone (~60 tokens) is far below that; cached tokens only show up
+# once the conversation history in front of the new turn grows past it.
+
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+EMOTIONS = ["happy", "sad", "angry", "surprised", "fearful", "neutral"]
+
+# Shortest prompt OpenAI's automatic prompt caching will cache
+CACHE_MIN_TOKENS = 1024
+
+def compact(text):
+    """Strip indentation, trailing spaces and blank lines so the prefix bytes never drift."""
+    return "\n".join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+# -----------------------
+# System Prefix
+# -----------------------
+ANALYSIS_SYSTEM_PREFIX = compact(f"""
+    You are Raphael, a helpful and emotionally intelligent AI assistant.
+    For each user message: reply naturally, empathetically and factually,
+    and classify the user's primary emotion as one of: {', '.join(EMOTIONS)}.
+""")
+
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "raphael_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "response": {"type": "string"},
+                "emotion": {"type": "string", "enum": EMOTIONS},
+            },
+            "required": ["response", "emotion"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+def user_message(text):
+    """The only per-turn part of the request: the user's words, whitespace-normalized."""
+    return re.sub(r"\s+", " ", text).strip()
+
+# -----------------------
+# Token Counting
+# -----------------------
+_encoding = None
+
+def count_tokens(messages, model="gpt-4o-mini"):
+    """
+    Input tokens for a string or a list of chat messages.
+    Uses tiktoken when installed, otherwise ~4 characters per token.
+    """
+    global _encoding
+    if isinstance(messages, str):
+        messages = [{"content": messages}]
+
+    if tiktoken is None:
+        return sum(len(m["content"]) // 4 + 4 for m in messages)
+
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("o200k_base")
+    # ~4 tokens of per-message framing in the chat format
+    return sum(len(_encoding.encode(m["content"])) + 4 for m in messages)
+
+
+# Quick report: legacy f-string layout vs compiled layout for one turn
+if __name__ == "__main__":
+    from raphael_core import build_analysis_prompt
+
+    sample = "I had a really long day at work and I feel completely drained."
+    legacy_system = "You are archangel Raphael's brain. Answer concisely and helpfully."
+
+    before = [{"content": legacy_system}, {"content": build_analysis_prompt(sample)}]
+    after = [{"content": ANALYSIS_SYSTEM_PREFIX}, {"content": user_message(sample)}]
+
+    print(f"Token counter: {'tiktoken' if tiktoken else 'estimate (~4 chars/token)'}")
+    print(f"Before: {count_tokens(before)} input tokens, 0 in a stable prefix")
+    print(f"After:  {count_tokens(after)} input tokens, "
+          f"{count_tokens(ANALYSIS_SYSTEM_PREFIX)} in the stable system prefix")
+    print(f"Note: prompts under {CACHE_MIN_TOKENS} tokens are never cached; the saving "
+          f"here is fewer tokens per turn, caching needs a longer conversation")
@@ -0,0 +1,249 @@
+# raphael_batch.py
+# ==================================
+# Offline / batch evaluation: runs transcripts (or WAV files) through the same
+# safety_check -> analyze_and_respond -> empathy prefix / AI emotion logic as
+# raphael_full.py, without the GUI, and streams one JSON result per line.
+#
+# Usage:
+#   python raphael_batch.py transcripts.jsonl -o results.jsonl --mock
+#   python raphael_batch.py recordings/ -o results.jsonl --workers 8
+#
+# JSONL input: one object per line with a "text" field (and optional "id").
+# Add --legacy-prompt to compare token usage and latency against the old prompt layout.
+# Prompt caching only applies past 1024 input tokens; use --turns-per-brain N to
+# run N consecutive items as one conversation so the context can grow that far.
+# N > 1 gives up per-item brain isolation (earlier turns steer later emotions), so
+# keep the default of 1 for emotion regression runs.
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import raphael_core
+from prompt_compiler import CACHE_MIN_TOKENS
+
+# transcribe() markers; main_loop in raphael_full.py never sends these to the brain
+ASR_FAILURES = ("[could not understand]", "[speech service unavailable]")
+
+
+# -----------------------
+# Input Loading
+# -----------------------
+def load_items(path):
+    """
+    Yields {"id", "text"} for JSONL input or {"id", "wav"} for a directory of WAV files.
+    Unusable JSONL lines yield {"id", "error"} so one bad record doesn't abort the run.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(".wav"):
+                yield {"id": name, "wav": os.path.join(path, name)}
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": line_no, "error": f"invalid JSON: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield {"id": line_no, "error": "record is not a JSON object"}
+                continue
+            text = record.get("text")
+            if not isinstance(text, str) or not text.strip():
+                yield {"id": record.get("id", line_no), "error": "missing or blank \"text\""}
+                continue
+            yield {"id": record.get("id", line_no), "text": text}
+
+def transcribe(wav_path):
+    """Speech-to-text for one WAV file (audio deps are only needed in this mode)."""
+    import scipy.io.wavfile as wav
+    import speech_recognition as sr
+    from audio_preprocess import preprocess, to_audio_data
+
+    fs, recording = wav.read(wav_path)
+    samples, asr_fs = preprocess(recording, fs)
+    if len(samples) == 0:
+        return "[could not understand]"
+    try:
+        return sr.Recognizer().recognize_google(to_audio_data(samples, asr_fs))
+    except sr.UnknownValueError:
+        return "[could not understand]"
+    except sr.RequestError:
+        return "[speech service unavailable]"
+
+# -----------------------
+# Brains
+# -----------------------
+def make_brain_factory(args):
+    """Each session gets a fresh brain so parallel runs never share a conversation context."""
+    if args.mock:
+        brain_cls = raphael_core.MockBrain
+        kwargs = {"latency": args.mock_latency}
+    else:
+        from raphael_brain import RaphaelBrain
+        brain_cls = RaphaelBrain
+        kwargs = {"model": args.model}
+
+    if args.legacy_prompt:
+        return lambda: brain_cls(**kwargs)
+    return lambda: raphael_core.make_analysis_brain(brain_cls, **kwargs)
+
+# -----------------------
+# Worker
+# -----------------------
+def run_item(item, brain, legacy_prompt=False):
+    start = time.perf_counter()
+    result = {"id": item["id"]}
+    if "error" in item:
+        result["error"] = item["error"]
+        result["latency_s"] = 0.0
+        return result
+    try:
+        text = item.get("text")
+        if text is None:
+            result["wav"] = item["wav"]
+            text = transcribe(item["wav"])
+        result["text"] = text
+        if text in ASR_FAILURES:
+            # Same as main_loop: nothing to respond to
+            result["asr_failed"] = True
+            result["latency_s"] = round(time.perf_counter() - start, 3)
+            return result
+        result.update(raphael_core.respond(text, brain, legacy_prompt))
+        if getattr(brain, "last_usage", None):
+            result["brain_usage"] = dict(brain.last_usage)
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+def run_session(items, brain_factory, legacy_prompt=False):
+    """Runs consecutive items as one conversation on a single fresh brain."""
+    brain = brain_factory()
+    return [run_item(item, brain, legacy_prompt) for item in items]
+
+def run_batch(items, brain_factory, out, workers=4, legacy_prompt=False, turns_per_brain=1):
+    """
+    Runs sessions of `turns_per_brain` items with at most `workers` in flight,
+    writing results as they complete. Sessions never share a brain.
+    """
+    user_emotions = collections.Counter()
+    ai_emotions = collections.Counter()
+    usages = []
+    count = errors = safety = asr_failed = 0
+    start = time.perf_counter()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        items = iter(items)
+
+        def fill():
+            while len(pending) < workers * 2:
+                session = [item for _, item in zip(range(turns_per_brain), items)]
+                if not session:
+                    return
+                pending.add(executor.submit(run_session, session, brain_factory, legacy_prompt))
+
+        fill()
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                for result in future.result():
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+
+                    count += 1
+                    if "error" in result:
+                        errors += 1
+                    elif result.get("asr_failed"):
+                        asr_failed += 1
+                    elif result["safety"]:
+                        safety += 1
+                    else:
+                        user_emotions[result["user_emotion"]] += 1
+                        ai_emotions[result["ai_emotion"]] += 1
+                    if "brain_usage" in result:
+                        usages.append(result["brain_usage"])
+            fill()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "items": count,
+        "errors": errors,
+        "asr_failed": asr_failed,
+        "safety_triggered": safety,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_items_per_s": round(count / elapsed, 2) if elapsed else 0.0,
+        "user_emotions": dict(user_emotions.most_common()),
+        "ai_emotions": dict(ai_emotions.most_common()),
+        "prompt_layout": "legacy" if legacy_prompt else "compiled",
+        "mean_input_tokens": _mean(usages, "input_tokens"),
+        "mean_cached_tokens": _mean(usages, "cached_tokens"),
+        "mean_brain_latency_s": _mean(usages, "latency_s"),
+        "turns_per_brain": turns_per_brain,
+        "cache_note": _cache_note(usages),
+    }
+
+def _cache_note(usages):
+    """Say plainly when no request was long enough for prompt caching to apply."""
+    longest = max((u.get("input_tokens", 0) for u in usages), default=0)
+    if longest >= CACHE_MIN_TOKENS:
+        return None
+    return (f"no request reached {CACHE_MIN_TOKENS} input tokens (longest: {longest}), so prompt "
+            f"caching cannot apply; raise --turns-per-brain to grow the conversation")
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be an integer, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def _mean(usages, key):
+    values = [u[key] for u in usages if key in u]
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Raphael's response logic over a batch of inputs.")
+    parser.add_argument("input", help="JSONL file of transcripts or a directory of WAV files")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=_positive_int, default=4, help="max concurrent items")
+    parser.add_argument("--mock", action="store_true", help="use the offline MockBrain instead of OpenAI")
+    parser.add_argument("--mock-latency", type=float, default=0.0, help="simulated MockBrain latency (s)")
+    parser.add_argument("--model", default="gpt-4o-mini", help="model for RaphaelBrain")
+    parser.add_argument("--legacy-prompt", action="store_true",
+                        help="use the old per-turn f-string prompt (for before/after comparisons)")
+    parser.add_argument("--turns-per-brain", type=_positive_int, default=1,
+                        help="consecutive items run as one conversation on a shared brain (default: 1). "
+                             "N > 1 breaks per-item brain isolation: use it only to measure prompt "
+                             "caching, never for emotion regression runs")
+    args = parser.parse_args(argv)
+
+    brain_factory = make_brain_factory(args)
+    items = load_items(args.input)
+
+    if args.output == "-":
+        summary = run_batch(items, brain_factory, sys.stdout, args.workers,
+                            args.legacy_prompt, args.turns_per_brain)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            summary = run_batch(items, brain_factory, out, args.workers,
+                                args.legacy_prompt, args.turns_per_brain)
+
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
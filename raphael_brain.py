@@ -1,5 +1,7 @@
 # raphael_brain.py
 # ==================================
+import time
+
 from openai import OpenAI
 
 # Initialize OpenAI client using your API key directly
@@ -12,16 +14,31 @@ class RaphaelBrain:
             "You are archangel Raphael's brain. Answer concisely and helpfully."
         )
         self.context = [{"role": "system", "content": self.system_prompt}]
+        self.last_usage = None
 
-    def ask(self, user_prompt: str, temperature: float = 0.3) -> str:
+    def ask(self, user_prompt: str, temperature: float = 0.3, response_format: dict = None) -> str:
+        """
+        :param response_format: Optional structured-output spec (e.g. a json_schema)
+            passed straight to the chat completions API.
+        """
         self.context.append({"role": "user", "content": user_prompt})
+        extra = {"response_format": response_format} if response_format else {}
+        self.last_usage = None
         try:
+            start = time.perf_counter()
             response = client.chat.completions.create(
                 model=self.model,
                 messages=self.context,
                 temperature=temperature,
-                max_tokens=512
+                max_tokens=512,
+                **extra
             )
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            self.last_usage = {
+                "input_tokens": response.usage.prompt_tokens,
+                "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+                "latency_s": round(time.perf_counter() - start, 3),
+            }
             answer = response.choices[0].message.content.strip()
             self.context.append({"role": "assistant", "content": answer})
             return answer
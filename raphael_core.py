@@ -0,0 +1,177 @@
+# raphael_core.py
+# ==================================
+# GUI-free conversation logic shared by raphael_full.py and raphael_batch.py.
+# Nothing here touches Tk, audio devices or global state, so every call can
+# run against its own brain instance.
+
+import json
+import re
+import time
+
+from prompt_compiler import (
+    EMOTIONS, ANALYSIS_SYSTEM_PREFIX, ANALYSIS_RESPONSE_FORMAT, user_message, count_tokens,
+)
+
+# RaphaelBrain.ask returns API failures as text instead of raising
+BRAIN_ERROR_PREFIX = "[Brain Error"
+
+SAFETY_REPLY = "It sounds like you are in serious distress. Please contact local emergency services or a crisis hotline immediately."
+
+# Empathetic prefix to make Raphael feel alive
+EMPATHY_PREFIX = {
+    "sad": "I'm so sorry to hear that. ",
+    "happy": "That’s wonderful! ",
+    "angry": "I can sense your frustration. ",
+    "fearful": "That sounds scary, but you’re not alone. ",
+    "surprised": "Wow, that’s unexpected! "
+}
+
+# Raphael's visual emotion (how he reacts to the user's emotion)
+AI_EMOTION_MAP = {
+    "sad": "sad",
+    "happy": "happy",
+    "angry": "neutral",
+    "fearful": "sad",
+    "surprised": "neutral",
+    "neutral": "neutral",
+}
+
+# -----------------------
+# Safety Check
+# -----------------------
+def safety_check(text):
+    danger_words = ["suicide", "kill myself", "end my life", "hurt myself"]
+    return any(w in text.lower() for w in danger_words)
+
+# -----------------------
+# Brain-Based Emotion Detection
+# -----------------------
+def build_analysis_prompt(text):
+    """Legacy layout: instructions rebuilt inside every user message (kept for comparisons)."""
+    return f"""
+        You are Raphael, a helpful and emotionally intelligent AI assistant.
+
+        Analyze the user's message below and do TWO things in your response:
+        1. Provide a natural, empathetic, and factual reply to the user.
+        2. Identify the primary emotion expressed by the user as one of:
+           happy, sad, angry, surprised, fearful, or neutral.
+
+        Respond strictly in this JSON format:
+        {{
+            "response": "<your reply here>",
+            "emotion": "<one of: happy, sad, angry, surprised, fearful, neutral>"
+        }}
+
+        User says: "{text}"
+        """
+
+def parse_analysis(raw_output):
+    """Turn the brain's raw output into {"emotion", "response"}."""
+    try:
+        # Try parsing as JSON first
+        data = json.loads(raw_output)
+    except Exception:
+        # Fallback: extract manually if model didn't return perfect JSON
+        response_match = re.search(r'"response"\s*:\s*"(.*?)"', raw_output, re.DOTALL)
+        emotion_match = re.search(r'"emotion"\s*:\s*"(.*?)"', raw_output, re.DOTALL)
+        data = {
+            "response": response_match.group(1).strip() if response_match else raw_output.strip(),
+            "emotion": emotion_match.group(1).strip().lower() if emotion_match else "neutral"
+        }
+
+    emotion = data.get("emotion", "neutral").lower()
+    if emotion not in EMOTIONS:
+        emotion = "neutral"
+
+    response = data.get("response", "I'm here to help.")
+    return {"emotion": emotion, "response": response}
+
+def make_analysis_brain(brain_cls, **kwargs):
+    """A brain whose system prompt is the byte-stable analysis prefix."""
+    return brain_cls(system_prompt=ANALYSIS_SYSTEM_PREFIX, **kwargs)
+
+def analyze_and_respond(text, brain, legacy_prompt=False):
+    """
+    Ask the brain for a reply + user emotion.
+    By default the brain must come from make_analysis_brain(): only the user's words are
+    sent and the JSON shape is enforced through structured output.
+    On failure the fallback reply comes back with an "error" key set.
+    """
+    try:
+        if legacy_prompt:
+            raw_output = brain.ask(build_analysis_prompt(text))
+        else:
+            raw_output = brain.ask(user_message(text), response_format=ANALYSIS_RESPONSE_FORMAT)
+        if raw_output.startswith(BRAIN_ERROR_PREFIX):
+            # Keep the app's old behaviour (the error text is the reply) but flag it
+            return {"emotion": "neutral", "response": raw_output, "error": raw_output}
+        return parse_analysis(raw_output)
+    except Exception as e:
+        print(f"[Unified Analysis Error: {e}]")
+        return {"emotion": "neutral", "response": "Sorry, I had trouble understanding that.",
+                "error": str(e)}
+
+# -----------------------
+# Reply Composition
+# -----------------------
+def sanitize_reply(smart_reply):
+    if not isinstance(smart_reply, str):
+        return "I apologize, I didn't get a clear response for that request."
+    return smart_reply
+
+def compose_reply(smart_reply, user_emotion):
+    """Returns (final_reply, ai_emotion) for a detected user emotion."""
+    final_reply = EMPATHY_PREFIX.get(user_emotion, "") + smart_reply
+    ai_emotion = AI_EMOTION_MAP.get(user_emotion, "neutral")
+    return final_reply, ai_emotion
+
+def respond(text, brain, legacy_prompt=False):
+    """
+    One full headless turn: safety check, analysis, empathy prefix and AI emotion.
+    A failed brain call returns {"safety": False, "error": ...} with no emotions.
+    """
+    if safety_check(text):
+        return {"safety": True, "user_emotion": None, "ai_emotion": "sad", "reply": SAFETY_REPLY}
+
+    result = analyze_and_respond(text, brain, legacy_prompt)
+    if "error" in result:
+        return {"safety": False, "error": result["error"]}
+    user_emotion = result.get("emotion", "neutral")
+    smart_reply = sanitize_reply(result.get("response", "I'm sorry, I couldn't generate a response."))
+    final_reply, ai_emotion = compose_reply(smart_reply, user_emotion)
+    return {"safety": False, "user_emotion": user_emotion, "ai_emotion": ai_emotion, "reply": final_reply}
+
+# -----------------------
+# Mock Brain (offline testing)
+# -----------------------
+class MockBrain:
+    """Deterministic stand-in for RaphaelBrain: keyword emotion, canned JSON reply."""
+
+    keywords = {
+        "sad": ["sad", "tired", "alone", "depress", "fail", "worthless", "cry"],
+        "happy": ["happy", "good", "excited", "love", "joy", "great"],
+        "angry": ["angry", "mad", "furious", "hate", "annoyed"],
+        "fearful": ["scared", "afraid", "fear", "worried", "nervous"],
+        "surprised": ["wow", "surprise", "unexpected", "can't believe"],
+    }
+
+    def __init__(self, latency=0.0, system_prompt=None):
+        self.latency = latency
+        self.context = [{"role": "system", "content": system_prompt or "Mock brain."}]
+        self.last_usage = None
+
+    def ask(self, prompt, **kwargs):
+        start = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        self.context.append({"role": "user", "content": prompt})
+        self.last_usage = {"input_tokens": count_tokens(self.context), "cached_tokens": 0}
+        user_text = prompt.rsplit("User says:", 1)[-1].lower()
+        emotion = next(
+            (e for e, words in self.keywords.items() if any(w in user_text for w in words)),
+            "neutral",
+        )
+        answer = json.dumps({"response": "I hear you. Tell me more.", "emotion": emotion})
+        self.context.append({"role": "assistant", "content": answer})
+        self.last_usage["latency_s"] = round(time.perf_counter() - start, 3)
+        return answer
@@ -1,11 +1,8 @@
 # raphael_full.py - FINAL CODE WITH NON-BLOCKING, THREAD-SAFE TTS FIX
 # =======================================================================
 import threading
-import tempfile
-import os
 import sounddevice as sd
 import numpy as np
-import scipy.io.wavfile as wav
 import speech_recognition as sr
 import pyttsx3
 import time
@@ -13,7 +10,12 @@ import tkinter as tk
 import concurrent.futures
 
 from raphael_brain import RaphaelBrain # NOTE: Assumes this is functional
+import raphael_core
+from raphael_core import safety_check, sanitize_reply, compose_reply, SAFETY_REPLY
 from graph import NeuralActivityVisualizer
+from face_renderer import FaceRenderer
+from wake_trigger import StandbyListener
+from audio_preprocess import preprocess, to_audio_data
 
 # Set the timeout limit for core AI processing
 AI_PROCESSING_TIMEOUT = 5 
@@ -21,21 +23,23 @@ AI_PROCESSING_TIMEOUT = 5
 # Define a constant for the timeout signal
 TIMEOUT_SIGNAL = "[TIMEOUT_OCCURRED]"
 
+# Always-on standby: only run ASR when the energy/spectral trigger fires.
+# Set to False to fall back to fixed 5-second recordings.
+STANDBY_MODE = True
+
+# Spectral noise gate before ASR (extra ~STFT cost, helps in noisy rooms)
+PREPROCESS_NOISE_GATE = False
+
 state = "idle"
 
 # -----------------------
-# EmotionFace Class (with Thread-Safety & Fix for Missing Emotion)
+# EmotionFace Class (updates coalesced by the shared FaceRenderer)
 # -----------------------
 class EmotionFace:
-    # (EmotionFace Class remains unchanged)
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Raphael")
         self.root.geometry("250x300")
-        self.face_label = tk.Label(self.root, text="", font=("Arial", 80))
-        self.face_label.pack(pady=10)
-        self.status_label = tk.Label(self.root, text="Waiting...", font=("Arial", 14))
-        self.status_label.pack(pady=10)
         self.faces = {
             "happy": "😊",
             "sad": "😢",
@@ -45,40 +49,15 @@ class EmotionFace:
             "surprised": "😮",
             "fearful": "😨",
         }
-        self.current_emotion = "neutral"
-        self.thinking = False
+        self.renderer = FaceRenderer(self.root, self.faces, face_font=("Arial", 80))
 
-    def update_face(self, emotion, text_feedback="", speak=False):
-        """Schedule the GUI update to run safely on the main thread (Tkinter thread-safety)."""
-        self.root.after(0, self._safe_update, emotion, text_feedback, speak)
+    @property
+    def current_emotion(self):
+        return self.renderer.current_emotion
 
-    def _safe_update(self, emotion, text_feedback, speak):
-        """The actual update logic that runs on the main thread."""
-        self.current_emotion = emotion
-        self.status_label.config(text=text_feedback)
-        
-        if emotion == "thinking":
-            if not self.thinking:
-                self.thinking = True
-                threading.Thread(target=self._animate_thinking, daemon=True).start()
-        else:
-            # FIX 2: Ensures the final emotion is displayed immediately upon leaving 'thinking'
-            self.thinking = False 
-            self.face_label.config(text=self.faces.get(emotion, "😐"))
-            
-    def _animate_thinking(self):
-        """Cycle between 🤔 and 😐 to simulate blinking/thinking."""
-        symbols = ["🤔", "😐", "🤔", "😐"]
-        while self.thinking:
-            for s in symbols:
-                if not self.thinking:
-                    break
-                    
-                # Use lambda for thread-safe Tkinter updates
-                self.root.after(0, lambda symbol=s: self.face_label.config(text=symbol))
-                time.sleep(0.6)
-                
-        # IMPORTANT: No need for a final face update here, as _safe_update handles it when self.thinking is set to False
+    def update_face(self, emotion, text_feedback="", speak=False):
+        """Queue the GUI update; bursts of calls are merged into one repaint on the Tk thread."""
+        self.renderer.post(emotion, text_feedback)
 
     def run(self):
         self.root.mainloop()
@@ -89,20 +68,19 @@ class EmotionFace:
 # NOTE: The initialization for brain, recognizer, and GUI must stay outside of functions
 # to be shared globally across threads.
 try:
-    brain = RaphaelBrain()
+    # Fixed analysis instructions live in the system prefix so every request shares it
+    brain = raphael_core.make_analysis_brain(RaphaelBrain)
 except NameError:
     print("WARNING: RaphaelBrain class not found. AI functionality will fail.")
-    # Create a mock brain for testing if needed
-    class MockBrain:
-        def ask(self, prompt):
-            if "Analyze the emotion" in prompt: return "neutral"
-            return "I need a functional RaphaelBrain to answer that question."
-    brain = MockBrain()
+    # Fall back to the offline mock brain for testing
+    brain = raphael_core.MockBrain()
 
 face = EmotionFace() # GUI
 
 recognizer = sr.Recognizer()
 
+standby = StandbyListener() if STANDBY_MODE else None
+
 # -----------------------
 # TTS Function (REVISED FIX: Dedicated Threaded Speak for Reliability)
 # -----------------------
@@ -170,93 +148,63 @@ def speak(text):
         time.sleep(0.1)
 
 
-# -----------------------
-# Safety Check
-# -----------------------
-def safety_check(text):
-    danger_words = ["suicide", "kill myself", "end my life", "hurt myself"]
-    return any(w in text.lower() for w in danger_words)
-
 # -----------------------
 # Brain-Based Emotion Detection (Helper)
 # -----------------------
 def analyze_and_respond(text):
     global state
     state = "thinking"
-    try:
-        # ----- Unified Prompt -----
-        prompt = f"""
-        You are Raphael, a helpful and emotionally intelligent AI assistant.
-
-        Analyze the user's message below and do TWO things in your response:
-        1. Provide a natural, empathetic, and factual reply to the user.
-        2. Identify the primary emotion expressed by the user as one of:
-           happy, sad, angry, surprised, fearful, or neutral.
-
-        Respond strictly in this JSON format:
-        {{
-            "response": "<your reply here>",
-            "emotion": "<one of: happy, sad, angry, surprised, fearful, neutral>"
-        }}
-
-        User says: "{text}"
-        """
-
-        raw_output = brain.ask(prompt)
+    result = raphael_core.analyze_and_respond(text, brain)
 
-        # ----- Parse Output -----
-        import json, re
-        try:
-            # Try parsing as JSON first
-            data = json.loads(raw_output)
-        except Exception:
-            # Fallback: extract manually if model didn't return perfect JSON
-            response_match = re.search(r'"response"\s*:\s*"(.*?)"', raw_output, re.DOTALL)
-            emotion_match = re.search(r'"emotion"\s*:\s*"(.*?)"', raw_output, re.DOTALL)
-            data = {
-                "response": response_match.group(1).strip() if response_match else raw_output.strip(),
-                "emotion": emotion_match.group(1).strip().lower() if emotion_match else "neutral"
-            }
+    print(f"Emotion: {result['emotion']}")
+    print(f"Response: {result['response']}")
+    if getattr(brain, "last_usage", None):
+        print(f"[Brain Usage: {brain.last_usage}]")
 
-        emotion = data.get("emotion", "neutral").lower()
-        if emotion not in ["happy", "sad", "angry", "surprised", "fearful", "neutral"]:
-            emotion = "neutral"
-
-        response = data.get("response", "I'm here to help.")
-
-        print(f"Emotion: {emotion}")
-        print(f"Response: {response}")
-
-        return {"emotion": emotion, "response": response}
-
-    except Exception as e:
-        print(f"[Unified Analysis Error: {e}]")
-        return {"emotion": "neutral", "response": "Sorry, I had trouble understanding that."}
+    return result
 
 
 # -----------------------
 # Voice Input Function
 # -----------------------
+def recognize(recording, fs):
+    """
+    Clean up an int16 recording and run speech recognition on it.
+    :return: (text, asr_ran). asr_ran is False when the recording was skipped as silence.
+    """
+    samples, asr_fs = preprocess(recording, fs, noise_gate=PREPROCESS_NOISE_GATE)
+    if len(samples) == 0:
+        # Nothing but silence: don't spend an ASR call on it
+        return "[could not understand]", False
+    audio = to_audio_data(samples, asr_fs)
+    try:
+        return recognizer.recognize_google(audio), True
+    except sr.UnknownValueError:
+        return "[could not understand]", True
+    except sr.RequestError:
+        return "[speech service unavailable]", True
+
 def listen(duration=5, fs=16000):
     global state
+
+    if standby is not None:
+        state = "idle"
+        print("💤 Standby: waiting for speech...")
+        recording = standby.wait_for_utterance()
+        state = "listening"
+        text, asr_ran = recognize(recording, standby.fs)
+        standby.report_outcome(asr_ran, has_speech=text != "[could not understand]")
+        print(f"[Standby Stats: {standby.stats()}]")
+        return text
+
     state = "listening"
 
     print("🎤 Speak now (5 seconds max)...")
     # Reduced duration might be better but 5s is kept as per original code
     recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
     sd.wait()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-        wav.write(temp_file.name, fs, recording)
-        filename = temp_file.name
-    with sr.AudioFile(filename) as source:
-        audio = recognizer.record(source)
-    os.remove(filename)
-    try:
-        return recognizer.recognize_google(audio)
-    except sr.UnknownValueError:
-        return "[could not understand]"
-    except sr.RequestError:
-        return "[speech service unavailable]"
+    text, _ = recognize(recording, fs)
+    return text
 
 # -----------------------
 # Generate AI Response (Concurrent Processing & Latency Fix with Timeout)
@@ -267,7 +215,7 @@ def generate_response(text):
 
     if safety_check(text):
         face.update_face("sad", text_feedback="Safety Protocol Activated")
-        return "It sounds like you are in serious distress. Please contact local emergency services or a crisis hotline immediately."
+        return SAFETY_REPLY
 
     # 1. Update face to "thinking" state
     face.update_face("thinking", text_feedback="Raphael is thinking...", speak=False)
@@ -299,7 +247,7 @@ def generate_response(text):
     # 2. Sanitize reply and emotion
     if not isinstance(smart_reply, str):
         print(f"--- DEBUG: Raw Brain Reply: {smart_reply} (Type: {type(smart_reply).__name__}) ---")
-        smart_reply = "I apologize, I didn't get a clear response for that request."
+        smart_reply = sanitize_reply(smart_reply)
     else:
         print(f"--- DEBUG: Raw Brain Reply: '{smart_reply.strip()}' ---")
 
@@ -307,27 +255,8 @@ def generate_response(text):
     face.update_face(user_emotion, text_feedback=f"You sound {user_emotion}", speak=False)
     print(f"[User Emotion Detected: {user_emotion}]")
 
-    # 4. Add empathetic prefix to make Raphael feel alive
-    empathy_prefix = {
-        "sad": "I'm so sorry to hear that. ",
-        "happy": "That’s wonderful! ",
-        "angry": "I can sense your frustration. ",
-        "fearful": "That sounds scary, but you’re not alone. ",
-        "surprised": "Wow, that’s unexpected! "
-    }.get(user_emotion, "")
-
-    final_reply = empathy_prefix + smart_reply
-
-    # 5. Determine Raphael's visual emotion (how he reacts)
-    ai_emotion_map = {
-        "sad": "sad",
-        "happy": "happy",
-        "angry": "neutral",
-        "fearful": "sad",
-        "surprised": "neutral",
-        "neutral": "neutral",
-    }
-    ai_emotion = ai_emotion_map.get(user_emotion, "neutral")
+    # 4. Add empathetic prefix and 5. determine Raphael's visual emotion (how he reacts)
+    final_reply, ai_emotion = compose_reply(smart_reply, user_emotion)
 
     # 6. Update Raphael’s emotion display
     face.update_face(ai_emotion, text_feedback=f"Raphael feels {ai_emotion}", speak=False)
@@ -0,0 +1,270 @@
+# wake_trigger.py
+# ==================================
+# Low-CPU always-on standby listening.
+#
+# Instead of recording fixed 5 s windows and shipping every one of them to
+# speech recognition, a persistent input stream feeds short blocks through a
+# cheap NumPy energy/spectral trigger. Only when the trigger fires is the
+# utterance collected and handed back for full ASR.
+
+import collections
+import queue
+import time
+
+import numpy as np
+import sounddevice as sd
+
+
+# -----------------------
+# Energy / Spectral Trigger
+# -----------------------
+class EnergyTrigger:
+    """
+    Frame-level voice activity trigger.
+
+    A frame counts as "active" when its energy is `threshold_db` above the
+    noise floor AND its spectrum is not flat (spectral flatness below
+    `flatness_max`), which rejects fans, hiss and other broadband noise.
+    The trigger fires after `min_active_frames` consecutive active frames.
+
+    The noise floor is the `noise_percentile` of the last `history_frames`
+    frame levels (~6 s of 30 ms blocks), so it follows the room up as well as
+    down; steady hum or fan noise ends up *being* the floor and never fires.
+    """
+
+    def __init__(self, threshold_db=12.0, flatness_max=0.5, min_active_frames=3,
+                 history_frames=200, noise_percentile=20, floor_db=-90.0):
+        self.threshold_db = threshold_db
+        self.flatness_max = flatness_max
+        self.min_active_frames = min_active_frames
+        self.noise_percentile = noise_percentile
+        self.levels = collections.deque(maxlen=history_frames)
+        self.noise_floor_db = floor_db
+        self.floor_db = floor_db
+        self.active_run = 0
+
+    @staticmethod
+    def frame_level_db(frame):
+        """RMS level of a float frame (-1..1) in dBFS."""
+        rms = np.sqrt(np.mean(np.square(frame)) + 1e-12)
+        return 20.0 * np.log10(rms)
+
+    @staticmethod
+    def spectral_flatness(frame):
+        """Geometric / arithmetic mean of the power spectrum (0 = tonal, 1 = noise)."""
+        power = np.square(np.abs(np.fft.rfft(frame))) + 1e-12
+        return np.exp(np.mean(np.log(power))) / np.mean(power)
+
+    def is_active(self, frame):
+        """Classify a single frame without touching the fire counter."""
+        level_db = self.frame_level_db(frame)
+        self.levels.append(level_db)
+        self.noise_floor_db = max(self.floor_db, np.percentile(self.levels, self.noise_percentile))
+        if level_db < self.noise_floor_db + self.threshold_db:
+            return False
+        return self.spectral_flatness(frame) < self.flatness_max
+
+    def process(self, frame):
+        """Feed one frame; returns True once the trigger fires."""
+        if self.is_active(frame):
+            self.active_run += 1
+        else:
+            self.active_run = 0
+        return self.active_run >= self.min_active_frames
+
+    def reset(self):
+        self.active_run = 0
+
+
+# -----------------------
+# Standby Listener
+# -----------------------
+class StandbyListener:
+    """
+    Keeps one input stream open and blocks until someone speaks.
+
+    :param keyword_spotter: Optional plug-in, called as
+        keyword_spotter(audio_int16, fs) -> bool on each triggered utterance.
+        Utterances it rejects are dropped before ASR.
+    :param baseline_window: Length of the fixed recording window this mode
+        replaces; used to estimate how many ASR calls were avoided.
+    """
+
+    def __init__(self, fs=16000, block_ms=30, trigger=None, keyword_spotter=None,
+                 pre_roll=0.3, hangover=0.8, max_utterance=5.0, baseline_window=5.0):
+        self.fs = fs
+        self.block_size = int(fs * block_ms / 1000)
+        self.trigger = trigger or EnergyTrigger()
+        self.keyword_spotter = keyword_spotter
+        self.pre_roll_blocks = max(1, int(pre_roll * 1000 / block_ms))
+        self.hangover_blocks = max(1, int(hangover * 1000 / block_ms))
+        self.max_blocks = int(max_utterance * 1000 / block_ms)
+        self.baseline_window = baseline_window
+
+        self._blocks = queue.Queue()
+        self._stream = None
+
+        # Stats
+        self.idle_seconds = 0.0
+        self.idle_cpu_seconds = 0.0
+        self.utterances = 0
+        self.asr_calls = 0
+        self.rejected_utterances = 0
+        self.skipped_utterances = 0
+        self.false_triggers = 0
+        self.false_trigger_idle_seconds = 0.0
+        self._last_wait_idle = 0.0
+
+    def _callback(self, indata, frames, time_info, status):
+        # Runs on the PortAudio thread: copy and return, nothing else
+        self._blocks.put(indata[:, 0].copy())
+
+    def start(self):
+        if self._stream is None:
+            self._stream = sd.InputStream(
+                samplerate=self.fs, channels=1, dtype="int16",
+                blocksize=self.block_size, callback=self._callback,
+            )
+            self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _collect_utterance(self, pre_roll):
+        """Keep reading after the trigger until silence or the length limit."""
+        blocks = list(pre_roll)
+        silent_run = 0
+        while len(blocks) < self.max_blocks and silent_run < self.hangover_blocks:
+            block = self._blocks.get()
+            blocks.append(block)
+            if self.trigger.is_active(block.astype(np.float32) / 32768.0):
+                silent_run = 0
+            else:
+                silent_run += 1
+        return np.concatenate(blocks)
+
+    def discard_pending(self):
+        """Drop audio captured while we were not listening (e.g. our own TTS)."""
+        while True:
+            try:
+                self._blocks.get_nowait()
+            except queue.Empty:
+                return
+
+    def wait_for_utterance(self):
+        """Block until speech is detected; returns the utterance as int16 samples."""
+        self.start()
+        self.discard_pending()
+        wait_idle = 0.0
+        while True:
+            pre_roll = collections.deque(maxlen=self.pre_roll_blocks)
+            self.trigger.reset()
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+
+            while True:
+                block = self._blocks.get()
+                pre_roll.append(block)
+                if self.trigger.process(block.astype(np.float32) / 32768.0):
+                    break
+
+            wait_idle += time.perf_counter() - wall_start
+            self.idle_cpu_seconds += time.thread_time() - cpu_start
+
+            audio = self._collect_utterance(pre_roll)
+            if self.keyword_spotter is not None and not self.keyword_spotter(audio, self.fs):
+                self.rejected_utterances += 1
+                continue
+
+            self.idle_seconds += wait_idle
+            self._last_wait_idle = wait_idle
+            self.utterances += 1
+            return audio
+
+    def report_outcome(self, asr_ran, has_speech=True):
+        """
+        Report what happened to the last returned utterance.
+        :param asr_ran: False if it was dropped before recognition (e.g. trimmed to
+            silence); that counts as an avoided ASR call, not a false trigger.
+        :param has_speech: False if recognition ran but found no speech; the silence
+            before it is then not credited as saved, since it still cost an ASR call.
+        """
+        if not asr_ran:
+            self.skipped_utterances += 1
+            return
+        self.asr_calls += 1
+        if not has_speech:
+            self.false_triggers += 1
+            self.false_trigger_idle_seconds += self._last_wait_idle
+
+    def stats(self):
+        """Idle-time CPU and how many fixed-window ASR calls standby avoided."""
+        # Every baseline_window of silence that ended in a real utterance would have been
+        # one wasted listen() call, and every rejected or skipped utterance is an ASR
+        # call not made
+        credited_idle = self.idle_seconds - self.false_trigger_idle_seconds
+        return {
+            "idle_seconds": round(self.idle_seconds, 1),
+            "idle_cpu_seconds": round(self.idle_cpu_seconds, 3),
+            "idle_cpu_percent": round(100.0 * self.idle_cpu_seconds / self.idle_seconds, 2)
+                                if self.idle_seconds else 0.0,
+            "triggers": self.utterances + self.rejected_utterances,
+            "asr_calls": self.asr_calls,
+            "asr_calls_with_speech": self.asr_calls - self.false_triggers,
+            "false_triggers": self.false_triggers,
+            "rejected_utterances": self.rejected_utterances,
+            "skipped_utterances": self.skipped_utterances,
+            "asr_calls_avoided": int(credited_idle // self.baseline_window)
+                                 + self.rejected_utterances + self.skipped_utterances,
+        }
+
+
+def check_steady_noise(seconds=60, level_dbfs=-40.0, fs=16000, block_ms=30):
+    """
+    Offline check: steady pink noise or 50 Hz hum at `level_dbfs` must never fire.
+    Returns {signal name: number of fires}.
+    """
+    rng = np.random.default_rng(0)
+    n = int(seconds * fs)
+    white = np.fft.rfft(rng.standard_normal(n))
+    pink = np.fft.irfft(white / np.sqrt(np.maximum(np.arange(len(white)), 1)), n)
+    hum = np.sin(2 * np.pi * 50 * np.arange(n) / fs) + 0.01 * rng.standard_normal(n)
+
+    block = int(fs * block_ms / 1000)
+    fires = {}
+    for name, noise in (("pink", pink), ("hum", hum)):
+        noise = noise / np.sqrt(np.mean(np.square(noise))) * 10 ** (level_dbfs / 20)
+        trigger = EnergyTrigger()
+        fires[name] = 0
+        for i in range(0, n - block + 1, block):
+            if trigger.process(noise[i:i + block]):
+                fires[name] += 1
+                trigger.reset()
+    return fires
+
+
+# Quick test
+if __name__ == "__main__":
+    fires = check_steady_noise()
+    print("Steady -40 dBFS noise fires:", fires)
+    assert not any(fires.values()), "trigger fires on steady background noise"
+
+    with StandbyListener() as listener:
+        print("💤 Standby: say something (Ctrl+C to quit)...")
+        try:
+            while True:
+                utterance = listener.wait_for_utterance()
+                print(f"Triggered: {len(utterance) / listener.fs:.2f}s of audio")
+                print("Stats:", listener.stats())
+        except KeyboardInterrupt:
+            pass